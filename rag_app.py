@@ -5,24 +5,24 @@ from shared import *
 st.set_page_config(layout="wide")
 st.markdown(css, unsafe_allow_html=True)
 
-if "doc_name" not in st.session_state:
-    # Name of the currently selected document/context
-    st.session_state.doc_name = None
-if "doc_hash" not in st.session_state:
-    # Hash identifier for the selected document/context
-    st.session_state.doc_hash = None
+if "doc_names" not in st.session_state:
+    # Names of the currently selected documents/context
+    st.session_state.doc_names = list(current_docs)[:1]
+if "doc_hashes" not in st.session_state:
+    # Hash identifiers for the selected documents/context
+    st.session_state.doc_hashes = []
 if "qa_list" not in st.session_state:
     # Uploaded QA list for evaluating the AI-Assistant
     st.session_state.qa_list: list[QAItem] = None  # type: ignore
-if "messages" not in st.session_state:
+if "memory" not in st.session_state:
     # Stores the chat history for the current session
-    st.session_state.messages = []
+    st.session_state.memory = ConversationMemory()
 if "eval_results" not in st.session_state:
     # Stores evaluation results for the current session
     st.session_state.eval_results = []
 
 
-def display_chat_history(messages: list[dict], noop: bool = False):
+def display_chat_history(messages: ConversationMemory, noop: bool = False):
     if noop:
         return
     if not messages:
@@ -54,10 +54,10 @@ def evaluate_ai(data: list[QAItem]):
         question = qa_item.question
         ideal_answer = qa_item.ideal_answer
         # Get relevant chunks using similarity search
-        query_embedding = create_embeddings([question])[0].values
+        query_embedding = create_embeddings([question], priority=Priority.EVAL)[0].values
         top_chunks = get_relevant_context(
             query_embedding,
-            st.session_state.doc_hash,
+            st.session_state.doc_hashes,
             st.session_state.k_chunks,
         )
         # Get a response from the AI-Assistant
@@ -66,6 +66,7 @@ def evaluate_ai(data: list[QAItem]):
             top_chunks,
             st.session_state.temperature,
             st.session_state.max_tokens,
+            priority=Priority.EVAL,
         ).text
         # Ask the AI-Assistant to rate the response
         eval: EvalResponse = generate_eval_response(
@@ -76,12 +77,17 @@ def evaluate_ai(data: list[QAItem]):
             st.session_state.max_tokens,
         ).parsed
         eval.question = question
-        eval.context = st.session_state.doc_name
-        eval.hash = st.session_state.doc_hash
+        eval.context = ", ".join(st.session_state.doc_names)
+        eval.hash = ", ".join(st.session_state.doc_hashes)
         st.session_state.eval_results.append(eval.model_dump())
     p.empty()
 
 
+def delete_documents(selected: dict[str, str]):
+    for doc_name, doc_hash in selected.items():
+        delete_document(doc_hash, doc_name)
+
+
 def process_pdf_or_json_file():
     if st.session_state.file:
         file = st.session_state.file
@@ -91,10 +97,10 @@ def process_pdf_or_json_file():
                 with st.spinner("Please wait...", show_time=True):
                     chunks = load_and_chunk_pdf_data(file)
                     fname = f"{file.name}-{random_letters()}"
-                    doc_hash = process_and_store_document_chunks(chunks, fname, doc_hash)
-                    if doc_hash:
-                        current_docs[fname] = doc_hash
+                    if process_and_store_document_chunks(chunks, fname, doc_hash):
                         st.toast("Document processed.", icon="ℹ️")
+                    else:
+                        st.toast("Document is being processed in another session.", icon="ℹ️")
             else:
                 st.toast("Document already processed.", icon="ℹ️")
         else:
@@ -111,25 +117,30 @@ st.sidebar.file_uploader(
     on_change=process_pdf_or_json_file,
 )
 
-st.session_state.doc_name = st.sidebar.radio(
-    "Select a document to use as context:",
+# Drop documents deleted since the last run, possibly by another session
+st.session_state.doc_names = [name for name in st.session_state.doc_names if name in current_docs]
+st.sidebar.multiselect(
+    "Select documents to use as context:",
     current_docs.keys(),
-    help="Choose one of the processed documents.  \
-        \nYour questions will be answered based on the selected document content.",
+    key="doc_names",
+    help="Choose one or more of the processed documents.  \
+        \nYour questions will be answered based on the selected documents content.",
     on_change=lambda: (
-        st.session_state.messages.clear(),
+        st.session_state.memory.clear(),
         st.toast(
             "Context changed. Chat history reset.",
             icon="ℹ️",
         ),
     ),
 )
-st.session_state.doc_hash = current_docs.get(st.session_state.doc_name)
+# Names deleted by another worker since the filter above are skipped
+selected_docs = {name: doc_hash for name in st.session_state.doc_names if (doc_hash := current_docs.get(name))}
+st.session_state.doc_hashes = list(selected_docs.values())
 st.sidebar.button(
-    "Delete document",
-    on_click=delete_document,
-    args=(st.session_state.doc_hash, st.session_state.doc_name),
-    disabled=not st.session_state.doc_hash,
+    "Delete selected documents",
+    on_click=delete_documents,
+    args=(selected_docs,),
+    disabled=not st.session_state.doc_hashes,
     use_container_width=True,
     type="primary",
 )
@@ -148,13 +159,13 @@ col_1.button(
     help="Upload a valid QA file to enable this button",
     on_click=evaluate_ai,
     args=(st.session_state.qa_list,),
-    disabled=any((st.session_state.doc_hash is None, st.session_state.qa_list is None)),
+    disabled=any((not st.session_state.doc_hashes, st.session_state.qa_list is None)),
     use_container_width=True,
 )
 col_1.button(
     "Clear Chat History",
     on_click=lambda: (
-        st.session_state.messages.clear(),
+        st.session_state.memory.clear(),
         st.toast("Chat history reset.", icon="ℹ️"),
     ),
     type="primary",
@@ -197,22 +208,22 @@ st.sidebar.checkbox(
     key="refine_prompt",
     help="If enabled, the assistant will attempt to improve your question using recent chat history.",
 )
-# Accept user input when doc_hash is defined
-prompt = st.chat_input(disabled=st.session_state.doc_hash is None)
-display_chat_history(st.session_state.messages, st.session_state.qa_button_pressed)
+# Accept user input when at least one document is selected
+prompt = st.chat_input(disabled=not st.session_state.doc_hashes)
+display_chat_history(st.session_state.memory, st.session_state.qa_button_pressed)
 if prompt:
-    if st.session_state.messages and st.session_state.refine_prompt:
-        # Refine user question using recent chat history
+    if st.session_state.memory and st.session_state.refine_prompt:
+        # Refine user question using the summarized chat history
         star = "⭐"
-        prompt = refined_question_response(prompt, st.session_state.messages[-4:]).text
+        prompt = refined_question_response(prompt, st.session_state.memory.history()).text
 
     with st.chat_message("user"):
         st.write(prompt, locals().get("star", ""))
 
-    query_embedding = create_embeddings([prompt])[0].values
+    query_embedding = create_embeddings([prompt], priority=Priority.INTERACTIVE)[0].values
     top_chunks = get_relevant_context(
         query_embedding,
-        st.session_state.doc_hash,
+        st.session_state.doc_hashes,
         st.session_state.k_chunks,
     )
 
@@ -226,5 +237,5 @@ if prompt:
                 st.session_state.max_tokens,
             )
         )
-    st.session_state.messages.append({"role": "user", "content": prompt})
-    st.session_state.messages.append({"role": "assistant", "content": response})
+    st.session_state.memory.append("user", prompt)
+    st.session_state.memory.append("assistant", response)
@@ -17,18 +17,52 @@ def parse_args():
     add_parser.add_argument("pdf", type=str, help="PDF filename")
 
     query_parser = subparsers.add_parser("query", help="Ask the AI-assistant about the document's contents")
-    query_parser.add_argument("pdf", type=str, help="PDF filename")
+    query_parser.add_argument("pdf", type=str, nargs="+", help="One or more PDF filenames")
     query_parser.add_argument("question", type=str, help="Question to ask")
 
     eval_parser = subparsers.add_parser("eval", help="Evaluate using loaded embeddings")
     eval_parser.add_argument("pdf", type=str, help="PDF filename")
     eval_parser.add_argument("validation_data", type=str, help="Path to validation data JSON file")
     eval_parser.add_argument("--output", type=str, default=f"eval_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv", help="Output CSV filename")
+
+    export_parser = subparsers.add_parser("export", help="Export the vector store or a single document to a snapshot file")
+    export_parser.add_argument("output", type=str, help="Snapshot filename (.npz)")
+    export_parser.add_argument("--pdf", type=str, default=None, help="Only export this PDF")
+    export_parser.add_argument("--no-compress", dest="compress", action="store_false", help="Store the snapshot uncompressed")
+
+    import_parser = subparsers.add_parser("import", help="Load a snapshot file into the vector store")
+    import_parser.add_argument("snapshot", type=str, help="Snapshot filename (.npz)")
     return parser.parse_args()
 
 
 def main():
     args = parse_args()
+    if args.command == "export":
+        doc_hash = None
+        if args.pdf:
+            with open(args.pdf, "rb") as doc:
+                doc_hash = get_document_hash(doc)
+            if not is_in_db(doc_hash):
+                logger.info(DOC_NOT_FOUND)
+                return
+        export_snapshot(args.output, doc_hash, args.compress)
+        return
+    if args.command == "import":
+        import_snapshot(args.snapshot)
+        return
+    if args.command == "query":
+        doc_hashes = []
+        for pdf in args.pdf:
+            with open(pdf, "rb") as doc:
+                doc_hashes.append(get_document_hash(doc))
+        if all(is_in_db(doc_hash) for doc_hash in doc_hashes):
+            query_embedding = create_embeddings([args.question], priority=Priority.INTERACTIVE)[0].values
+            top_chunks = get_relevant_context(query_embedding, doc_hashes, args.k_chunks)
+            response = context_aware_response(args.question, top_chunks).text
+            logger.info(f"{ANSWER}:\n{response}")
+        else:
+            logger.info(DOC_NOT_FOUND)
+        return
     with open(args.pdf, "rb") as doc:
         doc_hash = get_document_hash(doc)
         in_db = is_in_db(doc_hash)
@@ -36,18 +70,10 @@ def main():
             if not in_db:
                 chunks = load_and_chunk_pdf_data(doc)
                 fname = f"{Path(args.pdf).name}-{random_letters()}"
-                process_and_store_document_chunks(chunks, fname, doc_hash)
-                logger.info(DOC_PROCESSED)
+                if process_and_store_document_chunks(chunks, fname, doc_hash):
+                    logger.info(DOC_PROCESSED)
             else:
                 logger.info(DOC_ALREADY_PROCESSED)
-        elif args.command == "query":
-            if in_db:
-                query_embedding = create_embeddings([args.question])[0].values
-                top_chunks = get_relevant_context(query_embedding, doc_hash, args.k_chunks)
-                response = context_aware_response(args.question, top_chunks).text
-                logger.info(f"{ANSWER}:\n{response}")
-            else:
-                logger.info(DOC_NOT_FOUND)
         elif args.command == "eval":
             if in_db:
                 with open(args.validation_data, encoding="utf-8") as f:
@@ -61,15 +87,16 @@ def main():
                         question = item.question
                         ideal_answer = item.ideal_answer
 
-                        query_embedding = create_embeddings([question])[0].values
+                        query_embedding = create_embeddings([question], priority=Priority.EVAL)[0].values
                         top_chunks = get_relevant_context(query_embedding, doc_hash, args.k_chunks)
-                        response = context_aware_response(question, top_chunks).text
+                        response = context_aware_response(question, top_chunks, priority=Priority.EVAL).text
 
                         eval: EvalResponse = generate_eval_response(question, response, ideal_answer).parsed
                         eval.question = question
                         eval.context = doc_name
                         eval.hash = doc_hash
                         writer.writerow(eval.model_dump())
+                logger.info(f"Scheduler metrics: {scheduler.metrics()[Priority.EVAL.name]}")
             else:
                 logger.info(DOC_NOT_FOUND)
 
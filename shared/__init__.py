@@ -13,10 +13,15 @@ from .genai.genai_client import (
     create_embeddings,
     generate_eval_response,
     refined_question_response,
+    scheduler,
+    summarize_history_response,
 )
+from .genai.memory import ConversationMemory
 from .genai.models import EvalResponse, QAItem, qa_list_adapter
+from .genai.scheduler import Priority
 from .logging_helper import get_logger
 from .pdf_loader.chunker import fixed_size_chunker, load_and_chunk_pdf_data
+from .pdf_loader.dedup import near_duplicate_clusters
 from .vector_store.db_client import (
     collection,
     current_docs,
@@ -28,6 +33,7 @@ from .vector_store.db_client import (
     process_and_store_document_chunks,
     random_letters,
 )
+from .vector_store.snapshot import export_snapshot, import_snapshot
 
 bg_img_url = "https://i.imgur.com/6yLAgLv.jpeg"
 css = f"""
@@ -0,0 +1,106 @@
+from collections import deque
+from typing import Callable
+
+from ..logging_helper import get_logger
+from .genai_client import summarize_history_response
+
+logger = get_logger(__name__)
+# Rough estimate used by Gemini docs: one token is about four characters
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate, avoids a count_tokens round trip per message."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _count_tokens(messages: list[dict[str, str]]) -> int:
+    return sum(estimate_tokens(m["content"]) for m in messages)
+
+
+def _gemini_summary(summary: str, history: list[dict[str, str]]) -> str:
+    text = summarize_history_response(summary, history).text
+    # Blocked or empty responses have no text, the messages are kept and summarized on a later append
+    if not text:
+        raise ValueError("Empty summary response")
+    return text.strip()
+
+
+class ConversationMemory:
+    """Chat history with a token budget.
+
+    Recent messages are kept verbatim until they exceed `token_budget`, then the older ones are folded
+    into a rolling summary. Every message is summarized exactly once, the summary is extended
+    incrementally instead of being rebuilt from the full history.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 1024,
+        max_messages: int = 100,
+        summarize: Callable[[str, list[dict[str, str]]], str] = None,
+    ):
+        self.token_budget = token_budget
+        # Messages shown in the chat window, oldest are dropped once the cap is reached
+        self.messages: deque[dict[str, str]] = deque(maxlen=max_messages)
+        self.summary = ""
+        # Messages not yet folded into the summary
+        self._recent: list[dict[str, str]] = []
+        self._summarize = summarize or _gemini_summary
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __bool__(self):
+        return bool(self.messages)
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    def append(self, role: str, content: str):
+        """Adds a message, folding older ones into the summary once the budget is exceeded.
+        Called after the response is shown, so summarizing never delays the next question."""
+        message = {"role": role, "content": content}
+        self.messages.append(message)
+        self._recent.append(message)
+        self._compact()
+
+    def clear(self):
+        self.messages.clear()
+        self._recent.clear()
+        self.summary = ""
+
+    def history(self) -> list[dict[str, str]]:
+        """Returns the summary followed by the most recent messages, together within the token budget."""
+        history = [{"role": "summary", "content": self.summary}] if self.summary else []
+        remaining = self.token_budget - estimate_tokens(self.summary)
+        recent = []
+        for m in reversed(self._recent):
+            if remaining <= 0:
+                break
+            # The oldest message that still fits partially is cut to the remaining budget
+            content = m["content"][: remaining * CHARS_PER_TOKEN]
+            recent.append({"role": m["role"], "content": content})
+            remaining -= estimate_tokens(content)
+        history.extend(reversed(recent))
+        logger.debug(f"{len(history) = } | {len(self.summary) = } | {len(self._recent) = }")
+        return history
+
+    def _compact(self):
+        """Folds the oldest messages into the summary once the recent ones exceed the budget."""
+        if _count_tokens(self._recent) <= self.token_budget:
+            return
+        # Fold down to half the budget, so the summary is extended every few turns rather than every turn
+        n = 0
+        while n < len(self._recent) and _count_tokens(self._recent[n:]) > self.token_budget // 2:
+            n += 1
+        try:
+            self.summary = self._summarize(self.summary, self._recent[:n])
+        except Exception as e:
+            logger.warning(f"Summarizing {n} messages failed, retrying on the next message: {e!r}")
+            # While summaries keep failing, keep at most as many messages as the chat window
+            if len(self._recent) > self.messages.maxlen:
+                del self._recent[: len(self._recent) - self.messages.maxlen]
+            return
+        del self._recent[:n]
+        logger.info(f"Summarized {n} messages.")
@@ -33,3 +33,18 @@ Follow Up Question: {question}
 Given the above conversation and a follow up question, rephrase the follow up question to be a standalone question.
 Standalone question:
 """
+
+SUMMARY_SYSTEM_PROMPT = """You are a precise assistant that keeps running summaries of conversations."""
+SUMMARY_PROMPT_TEMPLATE = """
+Current Summary:
+---------------------
+{summary}
+---------------------
+New Messages:
+---------------------
+{chat_history}
+---------------------
+Extend the current summary with the new messages. Keep the topics, entities and facts
+needed to understand follow up questions, and drop everything else. Be concise.
+Updated summary:
+"""
@@ -0,0 +1,189 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import defaultdict
+from enum import IntEnum
+from typing import Callable, Iterator, TypeVar
+
+from google.genai import errors
+
+from ..logging_helper import get_logger
+
+logger = get_logger(__name__)
+T = TypeVar("T")
+
+# Requests per minute (https://ai.google.dev/gemini-api/docs/rate-limits). The defaults are high on purpose,
+# lower quotas are found through 429 backoff or set with GEMINI_RATE_LIMITS, e.g. "gemini-2.0-flash=15,*=30"
+RATE_LIMITS = {
+    "gemini-2.0-flash": 2000,
+    "gemini-2.0-flash-lite": 4000,
+    "text-embedding-004": 3000,
+}
+DEFAULT_RATE_LIMIT = 1000
+
+
+def rate_limits_from_env(env: str = None) -> dict[str, int]:
+    """Default limits updated with `model=rpm` pairs from GEMINI_RATE_LIMITS, `*` sets the limit of other models."""
+    limits = dict(RATE_LIMITS)
+    for item in (env if env is not None else os.getenv("GEMINI_RATE_LIMITS", "")).split(","):
+        if item.strip():
+            model, rpm = item.split("=")
+            limits[model.strip()] = int(rpm)
+    return limits
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    INGEST = 1
+    EVAL = 2
+
+
+class TokenBucket:
+    """Requests per minute limit which halves on 429 responses and recovers on success."""
+
+    def __init__(self, rpm: int):
+        self.rpm = rpm
+        self.rate = rpm / 60
+        self.tokens = float(rpm)
+        self.blocked_until = 0.0
+        self.failures = 0
+        self._updated = time.monotonic()
+
+    def try_take(self) -> float:
+        """Takes a token, returns 0 on success or the seconds to wait for the next one."""
+        now = time.monotonic()
+        self.tokens = min(self.rpm, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def throttle(self):
+        self.failures += 1
+        self.rate = max(self.rpm / 60 / 16, self.rate / 2)
+        self.tokens = 0
+        self.blocked_until = time.monotonic() + min(60, 2**self.failures)
+
+    def recover(self):
+        self.failures = 0
+        self.rate = min(self.rpm / 60, self.rate * 1.25)
+
+
+class RequestScheduler:
+    """Runs every Gemini request through per-model token buckets.
+
+    Waiting requests are served by priority, then in arrival order, so interactive requests skip
+    ahead of queued ingest and eval batches while those still use the remaining quota.
+    Buckets are per process: with several workers sharing one API key, set each worker's
+    limits to its share of the quota, otherwise the workers rely on 429 backoff.
+    """
+
+    def __init__(self, rate_limits: dict[str, int] = None, max_retries: int = 5):
+        self.rate_limits = rate_limits if rate_limits is not None else rate_limits_from_env()
+        self.max_retries = max_retries
+        self._cond = threading.Condition()
+        self._buckets: dict[str, TokenBucket] = {}
+        self._waiting: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        self._seq = itertools.count()
+        self._stats = {p: {"requests": 0, "throttled": 0, "total_wait": 0.0, "max_wait": 0.0} for p in Priority}
+
+    def _bucket(self, model: str) -> TokenBucket:
+        if model not in self._buckets:
+            self._buckets[model] = TokenBucket(self.rate_limits.get(model, self.rate_limits.get("*", DEFAULT_RATE_LIMIT)))
+        return self._buckets[model]
+
+    def _acquire(self, model: str, priority: Priority):
+        start = time.monotonic()
+        with self._cond:
+            bucket = self._bucket(model)
+            queue = self._waiting[model]
+            ticket = (priority, next(self._seq))
+            heapq.heappush(queue, ticket)
+            try:
+                while True:
+                    delay = bucket.try_take() if queue[0] == ticket else None
+                    if delay == 0:
+                        heapq.heappop(queue)
+                        break
+                    self._cond.wait(delay)
+            except BaseException:
+                # A ticket left behind would block every later request for the model
+                queue.remove(ticket)
+                heapq.heapify(queue)
+                self._cond.notify_all()
+                raise
+            self._cond.notify_all()
+            wait = time.monotonic() - start
+            stats = self._stats[priority]
+            stats["requests"] += 1
+            stats["total_wait"] += wait
+            stats["max_wait"] = max(stats["max_wait"], wait)
+        logger.debug(f"{model = } | {priority.name = } | {wait = :.2f}s")
+
+    def _done(self, model: str, priority: Priority, error: errors.APIError = None):
+        with self._cond:
+            if error is None:
+                self._bucket(model).recover()
+            else:
+                self._bucket(model).throttle()
+                self._stats[priority]["throttled"] += 1
+            self._cond.notify_all()
+
+    def submit(self, model: str, priority: Priority, request: Callable[[], T]) -> T:
+        """Runs `request` once the model's rate limit allows it, retrying on 429 responses."""
+        for attempt in range(self.max_retries + 1):
+            self._acquire(model, priority)
+            try:
+                result = request()
+            except errors.APIError as e:
+                if e.code != 429 or attempt == self.max_retries:
+                    raise
+                logger.warning(f"Rate limited by {model}, retrying ({attempt + 1}/{self.max_retries}).")
+                self._done(model, priority, e)
+                continue
+            self._done(model, priority)
+            return result
+
+    def stream(self, model: str, priority: Priority, request: Callable[[], Iterator[T]]) -> Iterator[T]:
+        """Like `submit`, for streaming requests. Only retried before the first chunk is received."""
+        for attempt in range(self.max_retries + 1):
+            self._acquire(model, priority)
+            try:
+                stream = request()
+                first = next(stream)
+            except StopIteration:
+                self._done(model, priority)
+                return
+            except errors.APIError as e:
+                if e.code != 429 or attempt == self.max_retries:
+                    raise
+                logger.warning(f"Rate limited by {model}, retrying ({attempt + 1}/{self.max_retries}).")
+                self._done(model, priority, e)
+                continue
+            self._done(model, priority)
+            yield first
+            yield from stream
+            return
+
+    def metrics(self) -> dict[str, dict[str, float]]:
+        """Queue depth and wait times per priority class."""
+        with self._cond:
+            depth = defaultdict(int)
+            for queue in self._waiting.values():
+                for priority, _ in queue:
+                    depth[priority] += 1
+            return {
+                p.name: {
+                    "queue_depth": depth[p],
+                    "requests": s["requests"],
+                    "throttled": s["throttled"],
+                    "avg_wait": s["total_wait"] / s["requests"] if s["requests"] else 0.0,
+                    "max_wait": s["max_wait"],
+                }
+                for p, s in self._stats.items()
+            }
@@ -0,0 +1,63 @@
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+from ..logging_helper import get_logger
+
+logger = get_logger(__name__)
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+
+def _shingles(text: str, k: int) -> np.ndarray:
+    """Hashes of the character k-grams of a text"""
+    grams = {text[i : i + k] for i in range(max(1, len(text) - k + 1))}
+    return np.fromiter((zlib.crc32(g.encode()) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def _lsh_params(threshold: float, num_perm: int, recall: float = 0.99) -> tuple[int, int]:
+    """Picks bands * rows = num_perm so that a pair at exactly `threshold` similarity becomes a candidate with
+    probability >= `recall`, using the most rows (fewest false candidates) that still reaches it.
+    Candidates are verified afterwards, so recall matters more than precision here."""
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    reaching = [(b, r) for b, r in options if 1 - (1 - threshold**r) ** b >= recall]
+    return max(reaching, key=lambda br: br[1]) if reaching else (num_perm, 1)
+
+
+def minhash_signatures(chunks: list[str], num_perm: int = 128, shingle_size: int = 5, seed: int = 1) -> np.ndarray:
+    """Computes a MinHash signature per chunk, the fraction of equal values estimates the Jaccard similarity."""
+    rng = np.random.default_rng(seed)
+    # Coefficients below 2^31 keep a * hash + b within uint64
+    a = rng.integers(1, 1 << 31, num_perm, dtype=np.uint64)
+    b = rng.integers(0, 1 << 31, num_perm, dtype=np.uint64)
+    signatures = np.empty((len(chunks), num_perm), dtype=np.uint64)
+    for i, chunk in enumerate(chunks):
+        hashes = _shingles(chunk, shingle_size)
+        signatures[i] = ((np.outer(hashes, a) + b) % MERSENNE_PRIME & MAX_HASH).min(axis=0)
+    return signatures
+
+
+def near_duplicate_clusters(chunks: list[str], threshold: float = 0.9, num_perm: int = 128) -> dict[int, list[int]]:
+    """Groups near-duplicate chunks using MinHash LSH.
+
+    Returns a mapping from each representative chunk index (the first occurrence) to the indices of its near duplicates.
+    """
+    bands, rows = _lsh_params(threshold, num_perm)
+    signatures = minhash_signatures(chunks, num_perm)
+    buckets: list[dict[bytes, list[int]]] = [defaultdict(list) for _ in range(bands)]
+    clusters: dict[int, list[int]] = {}
+    for i, signature in enumerate(signatures):
+        keys = [signature[band * rows : (band + 1) * rows].tobytes() for band in range(bands)]
+        candidates = dict.fromkeys(rep for band, key in enumerate(keys) for rep in buckets[band][key])
+        # Chunks are only compared with representatives, so clusters don't drift through chains of similar chunks
+        similarities = {c: np.mean(signatures[c] == signature) for c in candidates}
+        rep = max(similarities, key=similarities.get, default=None)
+        if rep is not None and similarities[rep] >= threshold:
+            clusters[rep].append(i)
+            continue
+        clusters[i] = []
+        for band, key in enumerate(keys):
+            buckets[band][key].append(i)
+    logger.debug(f"{len(chunks) = } | {len(clusters) = } | {threshold = } | {bands = } | {rows = }")
+    return clusters
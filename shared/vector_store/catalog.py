@@ -0,0 +1,111 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+from ..logging_helper import get_logger
+
+logger = get_logger(__name__)
+
+
+class SharedCatalog(MutableMapping[str, str]):
+    """Document name -> hash mapping shared by every process using the same data directory.
+
+    The mapping lives in SQLite, writes take the database write lock. Each process keeps a cached
+    copy which is only reloaded when `PRAGMA data_version` reports a commit from another connection,
+    so reads don't rescan the table.
+    """
+
+    def __init__(self, path: str | Path, seed: Callable[[], dict[str, str]] = None, timeout: float = 30):
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+        with self.transaction() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS docs (source TEXT PRIMARY KEY, hash TEXT NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS leases (hash TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)")
+            # Existing stores predate the catalog, fill it once from the collection
+            if seed and conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0] == 0:
+                conn.executemany("INSERT OR IGNORE INTO docs VALUES (?, ?)", seed().items())
+        self._version = None
+        self._docs: dict[str, str] = {}
+        self._refresh()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Holds the database write lock for a few catalog row writes, nested calls join the outer transaction.
+        Vector store writes stay outside, they are serialized per document by `ingest_lease`."""
+        with self._lock:
+            if self._conn.in_transaction:
+                yield self._conn
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                # The cached copy may hold rolled back writes
+                self._version = None
+                raise
+            self._conn.execute("COMMIT")
+
+    @contextmanager
+    def ingest_lease(self, doc_hash: str, ttl: float = 1800) -> Iterator[bool]:
+        """Yields True if this worker may ingest `doc_hash`, False if another worker holds the lease."""
+        owner = f"{self._owner}:{threading.get_ident()}"
+        with self.transaction() as conn:
+            row = conn.execute("SELECT owner, expires FROM leases WHERE hash = ?", (doc_hash,)).fetchone()
+            acquired = row is None or row[1] < time.time()
+            if acquired:
+                conn.execute("INSERT OR REPLACE INTO leases VALUES (?, ?, ?)", (doc_hash, owner, time.time() + ttl))
+        logger.debug(f"{doc_hash = } | {acquired = } | holder = {owner if acquired else row[0]}")
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                with self.transaction() as conn:
+                    conn.execute("DELETE FROM leases WHERE hash = ? AND owner = ?", (doc_hash, owner))
+
+    def _refresh(self):
+        with self._lock:
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != self._version:
+                self._docs = dict(self._conn.execute("SELECT source, hash FROM docs ORDER BY rowid"))
+                self._version = version
+                logger.debug(f"Catalog reloaded ({len(self._docs)})")
+
+    def __getitem__(self, source: str) -> str:
+        self._refresh()
+        return self._docs[source]
+
+    def __setitem__(self, source: str, doc_hash: str):
+        with self.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO docs VALUES (?, ?)", (source, doc_hash))
+            self._docs[source] = doc_hash
+
+    def __delitem__(self, source: str):
+        with self.transaction() as conn:
+            if conn.execute("DELETE FROM docs WHERE source = ?", (source,)).rowcount == 0:
+                raise KeyError(source)
+            self._docs.pop(source, None)
+
+    def __iter__(self):
+        self._refresh()
+        return iter(list(self._docs))
+
+    def __len__(self):
+        self._refresh()
+        return len(self._docs)
+
+    # Served from one refreshed copy, so a document deleted by another worker mid-iteration can't raise KeyError
+    def items(self) -> list[tuple[str, str]]:
+        self._refresh()
+        return list(self._docs.items())
+
+    def values(self) -> list[str]:
+        self._refresh()
+        return list(self._docs.values())
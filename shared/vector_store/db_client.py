@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
 import hashlib
 import io
+import os
 import random
 import string
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
@@ -10,11 +12,24 @@ import chromadb
 
 from ..genai.genai_client import create_embeddings
 from ..logging_helper import get_logger
+from ..pdf_loader.dedup import near_duplicate_clusters
+from .catalog import SharedCatalog
 
 logger = get_logger(__name__)
-chroma_client = chromadb.PersistentClient(path=str(Path(__file__).parent / "data"))
+data_dir = Path(__file__).parent / "data"
+data_dir.mkdir(exist_ok=True)
+# A PersistentClient keeps its index in process memory, workers scaled out across processes or nodes
+# should share a Chroma server instead (CHROMA_HOST / CHROMA_PORT)
+if chroma_host := os.getenv("CHROMA_HOST"):
+    chroma_client = chromadb.HttpClient(host=chroma_host, port=int(os.getenv("CHROMA_PORT", "8000")))
+else:
+    chroma_client = chromadb.PersistentClient(path=str(data_dir))
 collection = chroma_client.get_or_create_collection("documents", metadata={"hnsw:space": "cosine"})
-current_docs = {m["source"]: m["hash"] for m in collection.get(include=["metadatas"])["metadatas"]}
+query_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="query")
+current_docs = SharedCatalog(
+    data_dir / "catalog.sqlite3",
+    seed=lambda: {m["source"]: m["hash"] for m in collection.get(include=["metadatas"])["metadatas"]},
+)
 
 
 def random_letters(n=2):
@@ -43,42 +58,80 @@ def get_doc_name_by_hash(doc_hash: str):
 
 def delete_document(doc_hash: str, doc_name: str = None):
     """Deletes all document chunks with the given hash from the collection."""
-    collection.delete(where={"hash": doc_hash})
     if not doc_name:
         doc_name = get_doc_name_by_hash(doc_hash)
-    del current_docs[doc_name]
+    collection.delete(where={"hash": doc_hash})
+    current_docs.pop(doc_name, None)
     logger.info(f"Document {doc_name} with hash {doc_hash} deleted from store.")
 
 
-def get_relevant_context(query_embedding: list[float], doc_hash: str = None, k: int = 5, sort_by_id: bool = False):
-    """Retrieves relevant document chunks having a specific hash"""
-    logger.debug(f"{len(query_embedding)= } | {k = } | {doc_hash = }")
+def _query_document(query_embedding: list[float], doc_hash: str | None, k: int):
     results = collection.query(
         query_embeddings=[query_embedding],
         n_results=k,
         where={"hash": doc_hash} if doc_hash else None,
-        include=["documents", "metadatas"],
+        include=["documents", "metadatas", "distances"],
     )
+    return list(zip(results["documents"][0], results["metadatas"][0], results["distances"][0]))
+
+
+def get_relevant_context(query_embedding: list[float], doc_hash: str | list[str] = None, k: int = 5, sort_by_id: bool = False):
+    """Retrieves relevant document chunks having a specific hash, or the global top k across a list of hashes.
+    Only None searches the whole collection, an empty list selects nothing."""
+    logger.debug(f"{len(query_embedding)= } | {k = } | {doc_hash = }")
+    doc_hashes = [doc_hash] if doc_hash is None or isinstance(doc_hash, str) else doc_hash
+    if not doc_hashes:
+        return []
+    # One search per document, run concurrently with the same query embedding
+    candidates = [c for result in query_executor.map(lambda h: _query_document(query_embedding, h, k), doc_hashes) for c in result]
+    # Cosine distances share one embedding space, so they are comparable across documents
+    candidates = sorted(candidates, key=lambda c: c[2])[:k]
     logger.info("Context retrieved successfully.")
-    docs: list[str] = results["documents"][0]
     if sort_by_id:
-        meta = results["metadatas"][0]
-        reranked = sorted(zip(docs, meta), key=lambda x: x[1]["chunk_id"])
-        docs = [doc for doc, _ in reranked]
+        doc_order = {h: i for i, h in enumerate(doc_hashes)}
+        candidates.sort(key=lambda c: (doc_order.get(c[1]["hash"], 0), c[1]["chunk_id"]))
         logger.info("Sorted context successfully by chunk ID.")
-    return docs
-
-
-def process_and_store_document_chunks(chunks: list[str], filename: str, doc_hash: str):
-    """Processes document chunks, generates embeddings, and stores them in the ChromaDB collection."""
-    logger.debug(f"{len(chunks) = } | {filename = } | {doc_hash = }")
-    embeddings = create_embeddings(chunks)
-    for i, chunk in enumerate(chunks):
-        collection.add(
-            documents=[chunk],
-            embeddings=[embeddings[i].values],
-            metadatas=[{"source": filename, "chunk_id": i, "hash": doc_hash}],
-            ids=[f"{doc_hash}_{i}"],
-        )
+    return [doc for doc, _, _ in candidates]
+
+
+def process_and_store_document_chunks(chunks: list[str], filename: str, doc_hash: str, dedup_threshold: float | None = 0.9):
+    """Processes document chunks, generates embeddings, and stores them in the ChromaDB collection.
+
+    Near-duplicate chunks (estimated Jaccard similarity >= `dedup_threshold`) are stored once, the chunk IDs
+    of the dropped duplicates are kept in the representative's `duplicate_ids` metadata.
+    Returns None if another worker is ingesting or has already ingested the same document."""
+    logger.debug(f"{len(chunks) = } | {filename = } | {doc_hash = } | {dedup_threshold = }")
+    with current_docs.ingest_lease(doc_hash) as acquired:
+        if not acquired:
+            logger.info(f"{filename} is being processed by another worker.")
+            return None
+        if is_in_db(doc_hash):
+            logger.info(f"{filename} was added by another worker.")
+            return None
+        if dedup_threshold:
+            clusters = near_duplicate_clusters(chunks, dedup_threshold)
+        else:
+            clusters = {i: [] for i in range(len(chunks))}
+        chunk_ids = list(clusters)
+        embeddings = create_embeddings([chunks[i] for i in chunk_ids])
+        metadatas = [{"source": filename, "chunk_id": i, "hash": doc_hash} for i in chunk_ids]
+        for i, metadata in zip(chunk_ids, metadatas):
+            if clusters[i]:
+                metadata["duplicate_ids"] = ",".join(map(str, clusters[i]))
+        batch_size = chroma_client.get_max_batch_size()
+        for i in range(0, len(chunk_ids), batch_size):
+            batch = slice(i, i + batch_size)
+            collection.add(
+                documents=[chunks[j] for j in chunk_ids[batch]],
+                embeddings=[e.values for e in embeddings[batch]],
+                metadatas=metadatas[batch],
+                ids=[f"{doc_hash}_{j}" for j in chunk_ids[batch]],
+            )
+        current_docs[filename] = doc_hash
+    duplicates = [j for members in clusters.values() for j in members]
+    if duplicates:
+        # Each skipped chunk saves its text and a float32 embedding
+        saved_bytes = sum(len(chunks[j].encode()) for j in duplicates) + len(duplicates) * len(embeddings[0].values) * 4
+        logger.info(f"Skipped {len(duplicates)} near-duplicate chunks of {filename}, saving {len(duplicates)} embeddings ({saved_bytes / 1024:.1f} KiB).")
     logger.info(f"{filename} added to the vector store.")
     return doc_hash
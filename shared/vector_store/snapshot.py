@@ -0,0 +1,118 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+from ..genai.genai_client import EMBEDDING_MODEL
+from ..logging_helper import get_logger
+from .db_client import chroma_client, collection, current_docs
+
+logger = get_logger(__name__)
+SNAPSHOT_VERSION = 2
+
+
+def _pack_strings(strings: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Concatenated UTF-8 bytes plus offsets, a unicode column would pad every string to the longest one."""
+    encoded = [s.encode() for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(data: np.ndarray, offsets: np.ndarray) -> list[str]:
+    buffer = data.tobytes()
+    return [buffer[start:end].decode() for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+def _space() -> str:
+    return (collection.metadata or {}).get("hnsw:space", "l2")
+
+
+def export_snapshot(path: str | Path, doc_hash: str = None, compress: bool = True, page_size: int = 1000):
+    """Exports chunks, metadata and embeddings of one document (or the whole store) to an NPZ snapshot."""
+    ids, documents, metadatas, embeddings = [], [], [], []
+    # Paged, so the whole store is never held as one Chroma result
+    while True:
+        page = collection.get(
+            where={"hash": doc_hash} if doc_hash else None,
+            limit=page_size,
+            offset=len(ids),
+            include=["documents", "metadatas", "embeddings"],
+        )
+        if not page["ids"]:
+            break
+        ids.extend(page["ids"])
+        documents.extend(page["documents"])
+        metadatas.extend(json.dumps(m) for m in page["metadatas"])
+        embeddings.append(np.asarray(page["embeddings"], dtype=np.float32))
+    if not ids:
+        logger.info("Nothing to export.")
+        return 0
+    embeddings = np.concatenate(embeddings)
+    # One column per field, metadata is stored as JSON so the snapshot does not depend on its keys
+    columns = {
+        "version": np.array(SNAPSHOT_VERSION),
+        "embedding_model": np.array(EMBEDDING_MODEL),
+        "space": np.array(_space()),
+        "embeddings": embeddings,
+    }
+    for name, strings in (("ids", ids), ("documents", documents), ("metadatas", metadatas)):
+        columns[name], columns[f"{name}_offsets"] = _pack_strings(strings)
+    save = np.savez_compressed if compress else np.savez
+    with open(path, "wb") as f:
+        save(f, **columns)
+    logger.debug(f"{path = } | {doc_hash = } | {compress = } | {embeddings.shape = }")
+    logger.info(f"Exported {len(ids)} chunks to {path}.")
+    return len(ids)
+
+
+def import_snapshot(path: str | Path):
+    """Bulk loads an NPZ snapshot into the collection without recomputing the embeddings.
+
+    Documents already in the store are replaced, so each hash keeps exactly one name and no stale chunks.
+    Documents another worker is ingesting are skipped."""
+    with np.load(path, allow_pickle=False) as snapshot:
+        if int(snapshot["version"]) != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {int(snapshot['version'])}")
+        model, space = str(snapshot["embedding_model"]), str(snapshot["space"])
+        ids = _unpack_strings(snapshot["ids"], snapshot["ids_offsets"])
+        documents = _unpack_strings(snapshot["documents"], snapshot["documents_offsets"])
+        metadatas = [json.loads(m) for m in _unpack_strings(snapshot["metadatas"], snapshot["metadatas_offsets"])]
+        embeddings = snapshot["embeddings"]
+    # Validate everything before the first write
+    if model != EMBEDDING_MODEL:
+        raise ValueError(f"Snapshot embedded with {model}, the store uses {EMBEDDING_MODEL}")
+    if space != _space():
+        raise ValueError(f"Snapshot distance {space} does not match the store distance {_space()}")
+    stored = collection.get(limit=1, include=["embeddings"])["embeddings"]
+    if len(stored) and len(stored[0]) != embeddings.shape[1]:
+        raise ValueError(f"Snapshot dimension {embeddings.shape[1]} does not match the store dimension {len(stored[0])}")
+
+    rows_by_hash: dict[str, list[int]] = {}
+    for i, m in enumerate(metadatas):
+        rows_by_hash.setdefault(m["hash"], []).append(i)
+    batch_size = chroma_client.get_max_batch_size()
+    imported = 0
+    for doc_hash, rows in rows_by_hash.items():
+        # Same lease as ingest, so an import never interleaves with another worker writing this document
+        with current_docs.ingest_lease(doc_hash) as acquired:
+            if not acquired:
+                logger.info(f"Skipped {doc_hash}, it is being processed by another worker.")
+                continue
+            collection.delete(where={"hash": doc_hash})
+            for i in range(0, len(rows), batch_size):
+                batch = rows[i : i + batch_size]
+                collection.add(
+                    ids=[ids[j] for j in batch],
+                    documents=[documents[j] for j in batch],
+                    metadatas=[metadatas[j] for j in batch],
+                    embeddings=embeddings[batch],
+                )
+            with current_docs.transaction():
+                for name in [name for name, h in current_docs.items() if h == doc_hash]:
+                    del current_docs[name]
+                current_docs[metadatas[rows[0]]["source"]] = doc_hash
+        imported += len(rows)
+    logger.debug(f"{path = } | {len(ids) = } | {len(rows_by_hash) = } | {batch_size = }")
+    logger.info(f"Imported {imported} chunks from {path}.")
+    return imported
@@ -0,0 +1,7 @@
+import os
+
+from dotenv import load_dotenv
+
+# `shared` creates the Gemini client on import, unit tests never call the API so any key will do
+load_dotenv()
+os.environ.setdefault("GEMINI_API_KEY", "unit-test")
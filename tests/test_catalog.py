@@ -0,0 +1,69 @@
+import pytest
+
+from shared.vector_store.catalog import SharedCatalog
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "catalog.sqlite3"
+
+
+def test_seeded_once(db_path):
+    first = SharedCatalog(db_path, seed=lambda: {"a.pdf-xy": "hash_a"})
+    second = SharedCatalog(db_path, seed=lambda: {"b.pdf-xy": "hash_b"})
+    assert dict(first) == dict(second) == {"a.pdf-xy": "hash_a"}
+
+
+def test_writes_visible_to_other_connections(db_path):
+    first = SharedCatalog(db_path)
+    second = SharedCatalog(db_path)
+    first["a.pdf-xy"] = "hash_a"
+    assert dict(second) == {"a.pdf-xy": "hash_a"}
+    del second["a.pdf-xy"]
+    assert "a.pdf-xy" not in first
+    with pytest.raises(KeyError):
+        del first["a.pdf-xy"]
+
+
+def test_rollback_discards_cached_writes(db_path):
+    catalog = SharedCatalog(db_path)
+    with pytest.raises(RuntimeError):
+        with catalog.transaction():
+            catalog["a.pdf-xy"] = "hash_a"
+            raise RuntimeError
+    assert dict(catalog) == {}
+
+
+def test_ingest_lease_is_exclusive(db_path):
+    first = SharedCatalog(db_path)
+    second = SharedCatalog(db_path)
+    with first.ingest_lease("hash_a") as acquired:
+        assert acquired
+        with second.ingest_lease("hash_a") as other:
+            assert not other
+        with second.ingest_lease("hash_b") as other:
+            assert other
+    with second.ingest_lease("hash_a") as acquired:
+        assert acquired
+
+
+def test_expired_lease_can_be_taken_over(db_path):
+    first = SharedCatalog(db_path)
+    second = SharedCatalog(db_path)
+    with first.ingest_lease("hash_a", ttl=-1) as acquired:
+        assert acquired
+        with second.ingest_lease("hash_a") as other:
+            assert other
+
+
+def test_items_survive_concurrent_delete(db_path):
+    first = SharedCatalog(db_path)
+    second = SharedCatalog(db_path)
+    first["x"] = "hash_x"
+    first["y"] = "hash_y"
+    items = iter(first.items())
+    assert next(items) == ("x", "hash_x")
+    del second["y"]
+    assert next(items) == ("y", "hash_y")
+    assert first.values() == ["hash_x"]
+    assert first.get("y") is None
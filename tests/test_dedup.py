@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from shared.pdf_loader.dedup import _lsh_params, minhash_signatures, near_duplicate_clusters
+
+FOOTER = "ifab laws of the game 2024/25. all rights reserved, reproduction without permission is prohibited."
+
+
+@pytest.mark.parametrize("threshold", [0.5, 0.8, 0.9, 0.95])
+def test_lsh_params_reach_recall(threshold):
+    bands, rows = _lsh_params(threshold, 128)
+    assert bands * rows == 128
+    assert 1 - (1 - threshold**rows) ** bands >= 0.99
+
+
+def test_signatures_estimate_similarity():
+    signatures = minhash_signatures([FOOTER, FOOTER, "a completely different sentence about offside."])
+    assert (signatures[0] == signatures[1]).all()
+    assert (signatures[0] == signatures[2]).mean() < 0.2
+
+
+def test_clusters_keep_first_occurrence():
+    chunks = [f"unique rule number {i} covers situation {i * 7919} on the field." for i in range(50)]
+    chunks[3] = chunks[20] = FOOTER
+    chunks[41] = FOOTER.replace("prohibited", "prohibited!")
+    clusters = near_duplicate_clusters(chunks, threshold=0.9)
+    assert clusters[3] == [20, 41]
+    assert len(clusters) == len(chunks) - 2
+    assert all(members == [] for rep, members in clusters.items() if rep != 3)
+
+
+def test_assigns_to_most_similar_representative(monkeypatch):
+    # Segments of 32 signature values: the chunk matches half of the first representative and 3/4 of the second
+    first, second, chunk = ([v for v in values for _ in range(32)] for values in ([0, 0, 0, 0], [0, 1, 1, 1], [0, 0, 1, 1]))
+    monkeypatch.setattr("shared.pdf_loader.dedup.minhash_signatures", lambda chunks, num_perm: np.array([first, second, chunk], dtype=np.uint64))
+    assert near_duplicate_clusters(["first", "second", "chunk"], threshold=0.5) == {0: [], 1: [2]}
@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+from shared.genai.memory import CHARS_PER_TOKEN, ConversationMemory, estimate_tokens
+
+
+def fake_summarize(calls: list):
+    def summarize(summary: str, history: list[dict[str, str]]) -> str:
+        calls.append(len(history))
+        return f"{summary}|{len(history)}"
+
+    return summarize
+
+
+def test_recent_messages_bounded_without_history_calls():
+    calls = []
+    memory = ConversationMemory(token_budget=100, max_messages=10, summarize=fake_summarize(calls))
+    for i in range(500):
+        memory.append("user", f"question {i} " + "x" * 100)
+        memory.append("assistant", f"answer {i} " + "y" * 300)
+    assert len(memory) == 10
+    assert sum(estimate_tokens(m["content"]) for m in memory._recent) <= memory.token_budget
+    # Every message is summarized exactly once
+    assert sum(calls) + len(memory._recent) == 1000
+
+
+def test_history_within_budget():
+    memory = ConversationMemory(token_budget=100, summarize=lambda summary, history: "s" * 40)
+    for _ in range(5):
+        memory.append("user", "q" * 200)
+        memory.append("assistant", "a" * 2000)
+    history = memory.history()
+    assert history[0]["role"] == "summary"
+    assert sum(estimate_tokens(m["content"]) for m in history) <= memory.token_budget + len(history)
+    assert len(history[-1]["content"]) <= memory.token_budget * CHARS_PER_TOKEN
+
+
+def test_no_summary_under_budget():
+    calls = []
+    memory = ConversationMemory(token_budget=1000, summarize=fake_summarize(calls))
+    memory.append("user", "hello")
+    memory.append("assistant", "hi")
+    assert calls == []
+    assert memory.history() == [{"role": "user", "content": "hello"}, {"role": "assistant", "content": "hi"}]
+    memory.clear()
+    assert not memory and memory.history() == []
+
+
+def test_failed_summary_keeps_messages():
+    def failing(summary, history):
+        raise RuntimeError("quota")
+
+    memory = ConversationMemory(token_budget=100, summarize=failing)
+    for i in range(3):
+        memory.append("user", f"question {i} " + "x" * 200)
+        memory.append("assistant", f"answer {i} " + "y" * 400)
+    assert len(memory._recent) == 6
+    assert memory.summary == ""
+    assert memory.history()
+
+    # Compaction is retried on the next message once summaries work again
+    calls = []
+    memory._summarize = fake_summarize(calls)
+    memory.append("user", "next question")
+    assert sum(calls) + len(memory._recent) == 7
+    assert memory.summary
+
+
+def test_blocked_summary_response_keeps_messages(monkeypatch):
+    monkeypatch.setattr("shared.genai.memory.summarize_history_response", lambda summary, history: SimpleNamespace(text=None))
+    memory = ConversationMemory(token_budget=100)
+    memory.append("user", "x" * 1000)
+    memory.append("assistant", "y" * 1000)
+    assert len(memory._recent) == 2 and memory.summary == ""
@@ -0,0 +1,38 @@
+import uuid
+
+import chromadb
+import pytest
+
+from shared.vector_store import db_client
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    collection = chromadb.EphemeralClient().create_collection(f"documents-{uuid.uuid4().hex}", metadata={"hnsw:space": "cosine"})
+    vectors = {
+        "a": [[1.0, 0.0, 0.0], [1.0, 0.3, 0.0], [0.0, 0.0, 1.0], [0.0, 1.0, 1.0]],
+        "b": [[1.0, 0.1, 0.0], [0.0, 1.0, 0.0], [0.0, 1.0, 0.2], [0.1, 1.0, 0.0]],
+    }
+    for doc_hash, embeddings in vectors.items():
+        collection.add(
+            ids=[f"{doc_hash}_{i}" for i in range(4)],
+            documents=[f"{doc_hash}{i}" for i in range(4)],
+            embeddings=embeddings,
+            metadatas=[{"source": doc_hash, "chunk_id": i, "hash": doc_hash} for i in range(4)],
+        )
+    monkeypatch.setattr(db_client, "collection", collection)
+    return collection
+
+
+def test_global_top_k_across_documents(collection):
+    assert db_client.get_relevant_context([1.0, 0.0, 0.0], ["a", "b"], k=3) == ["a0", "b0", "a1"]
+    assert db_client.get_relevant_context([1.0, 0.0, 0.0], "b", k=2) == ["b0", "b3"]
+
+
+def test_sort_by_id_follows_selection_order(collection):
+    assert db_client.get_relevant_context([1.0, 0.0, 0.0], ["b", "a"], k=3, sort_by_id=True) == ["b0", "a0", "a1"]
+
+
+def test_empty_selection_returns_nothing(collection):
+    assert db_client.get_relevant_context([1.0, 0.0, 0.0], [], k=4) == []
+    assert len(db_client.get_relevant_context([1.0, 0.0, 0.0], None, k=8)) == 8
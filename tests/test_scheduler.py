@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+from google.genai import errors
+
+from shared.genai.scheduler import Priority, RequestScheduler, rate_limits_from_env
+
+
+def rate_limit_error():
+    return errors.ClientError(429, {"error": {"message": "quota", "status": "RESOURCE_EXHAUSTED"}})
+
+
+def test_rate_limits_from_env():
+    limits = rate_limits_from_env("gemini-2.0-flash=15, *=30")
+    assert limits["gemini-2.0-flash"] == 15
+    assert RequestScheduler(limits)._bucket("unknown-model").rpm == 30
+
+
+def test_waiting_requests_served_by_priority():
+    scheduler = RequestScheduler({"model": 600})
+    scheduler._bucket("model").tokens = 0
+    order = []
+    threads = [threading.Thread(target=scheduler.submit, args=("model", Priority.EVAL, lambda i=i: order.append(f"eval{i}"))) for i in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.02)
+    interactive = threading.Thread(target=scheduler.submit, args=("model", Priority.INTERACTIVE, lambda: order.append("chat")))
+    interactive.start()
+    for t in [*threads, interactive]:
+        t.join()
+    assert order == ["chat", "eval0", "eval1", "eval2"]
+    metrics = scheduler.metrics()
+    assert metrics["EVAL"]["requests"] == 3 and metrics["EVAL"]["queue_depth"] == 0
+
+
+def test_retries_after_rate_limit(monkeypatch):
+    scheduler = RequestScheduler({"model": 600})
+    calls = []
+
+    def request():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise rate_limit_error()
+        return "ok"
+
+    monkeypatch.setattr("shared.genai.scheduler.TokenBucket.throttle", lambda bucket: setattr(bucket, "rate", bucket.rate / 2))
+    assert scheduler.submit("model", Priority.INGEST, request) == "ok"
+    assert len(calls) == 2
+    assert scheduler._bucket("model").rate < 10
+    assert scheduler.metrics()["INGEST"]["throttled"] == 1
+
+
+def test_other_errors_are_not_retried():
+    scheduler = RequestScheduler({"model": 600}, max_retries=3)
+    calls = []
+
+    def request():
+        calls.append(1)
+        raise errors.ClientError(400, {"error": {"message": "bad request"}})
+
+    with pytest.raises(errors.ClientError):
+        scheduler.submit("model", Priority.INTERACTIVE, request)
+    assert len(calls) == 1
+
+
+def test_stream_retries_before_first_chunk(monkeypatch):
+    scheduler = RequestScheduler({"model": 600})
+    monkeypatch.setattr("shared.genai.scheduler.TokenBucket.throttle", lambda bucket: None)
+    attempts = []
+
+    def request():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise rate_limit_error()
+        yield from ["a", "b"]
+
+    assert list(scheduler.stream("model", Priority.INTERACTIVE, request)) == ["a", "b"]
+    assert len(attempts) == 2
+
+
+def test_interrupted_wait_releases_ticket(monkeypatch):
+    scheduler = RequestScheduler({"model": 60})
+    scheduler._bucket("model").tokens = 0
+
+    def interrupted_wait(timeout=None):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(scheduler._cond, "wait", interrupted_wait)
+    with pytest.raises(KeyboardInterrupt):
+        scheduler.submit("model", Priority.EVAL, lambda: None)
+    assert scheduler._waiting["model"] == []
@@ -0,0 +1,83 @@
+import uuid
+
+import chromadb
+import numpy as np
+import pytest
+
+from shared.vector_store import snapshot
+from shared.vector_store.catalog import SharedCatalog
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    client = chromadb.EphemeralClient()
+    collection = client.create_collection(f"documents-{uuid.uuid4().hex}", metadata={"hnsw:space": "cosine"})
+    catalog = SharedCatalog(tmp_path / "catalog.sqlite3")
+    monkeypatch.setattr(snapshot, "chroma_client", client)
+    monkeypatch.setattr(snapshot, "collection", collection)
+    monkeypatch.setattr(snapshot, "current_docs", catalog)
+    return collection, catalog
+
+
+def add_document(collection, catalog, name: str, doc_hash: str, n: int, dim: int = 4):
+    collection.add(
+        ids=[f"{doc_hash}_{i}" for i in range(n)],
+        documents=[f"chunk {i} of {name}, naïve café" for i in range(n)],
+        metadatas=[{"source": name, "chunk_id": i, "hash": doc_hash} for i in range(n)],
+        embeddings=np.random.default_rng(n).random((n, dim)).tolist(),
+    )
+    catalog[name] = doc_hash
+
+
+def test_roundtrip_replaces_existing_document(store, tmp_path):
+    collection, catalog = store
+    add_document(collection, catalog, "a.pdf-xy", "hash_a", 5)
+    add_document(collection, catalog, "b.pdf-xy", "hash_b", 3)
+    path = tmp_path / "a.npz"
+    assert snapshot.export_snapshot(path, "hash_a", page_size=2) == 5
+    exported = collection.get(where={"hash": "hash_a"}, include=["documents", "embeddings"])
+
+    # Same document ingested on another node under another name, with an extra stale chunk
+    collection.delete(where={"hash": "hash_a"})
+    del catalog["a.pdf-xy"]
+    add_document(collection, catalog, "a.pdf-zz", "hash_a", 6)
+
+    assert snapshot.import_snapshot(path) == 5
+    assert dict(catalog) == {"b.pdf-xy": "hash_b", "a.pdf-xy": "hash_a"}
+    imported = collection.get(where={"hash": "hash_a"}, include=["documents", "embeddings"])
+    assert sorted(imported["ids"]) == sorted(exported["ids"])
+    assert sorted(imported["documents"]) == sorted(exported["documents"])
+    assert collection.count() == 8
+
+
+def test_import_rejects_other_embedding_model(store, tmp_path, monkeypatch):
+    collection, catalog = store
+    add_document(collection, catalog, "a.pdf-xy", "hash_a", 2)
+    path = tmp_path / "a.npz"
+    snapshot.export_snapshot(path, compress=False)
+    monkeypatch.setattr(snapshot, "EMBEDDING_MODEL", "other-model")
+    with pytest.raises(ValueError):
+        snapshot.import_snapshot(path)
+    assert collection.count() == 2
+
+
+def test_pack_strings_roundtrip():
+    strings = ["", "abc", "naïve café", "x" * 1000]
+    assert snapshot._unpack_strings(*snapshot._pack_strings(strings)) == strings
+
+
+def test_import_skips_documents_leased_by_another_worker(store, tmp_path):
+    collection, catalog = store
+    add_document(collection, catalog, "a.pdf-xy", "hash_a", 3)
+    add_document(collection, catalog, "b.pdf-xy", "hash_b", 2)
+    path = tmp_path / "store.npz"
+    snapshot.export_snapshot(path)
+    collection.delete(where={"hash": "hash_b"})
+    del catalog["b.pdf-xy"]
+    # Another worker is ingesting hash_a under another name
+    other_worker = SharedCatalog(tmp_path / "catalog.sqlite3")
+    with other_worker.ingest_lease("hash_a") as acquired:
+        assert acquired
+        assert snapshot.import_snapshot(path) == 2
+    assert dict(catalog) == {"a.pdf-xy": "hash_a", "b.pdf-xy": "hash_b"}
+    assert collection.count() == 5